@@ -0,0 +1,216 @@
+"""
+backfill.py
+- Walks every dated snapshot in data/ (repos, weather, crypto) and reprocesses it
+- Regenerates dated charts and a per-date aggregate (data/daily_summary.csv)
+- Runs dates in parallel across cores with a ProcessPoolExecutor
+- Checkpoints to data/backfill_state.json so an interrupted run resumes, and skips
+  dates whose input files and code version haven't changed
+- "Code version" hashes only the readers/chart functions used here, so e.g. SMTP or
+  email template edits don't invalidate every date
+
+Not covered: the dated repos/weather/crypto CSVs are inputs, not rebuilt. They
+are already the output of simplify() and friends, and the raw API payloads aren't
+kept, so a new simplify() column can't be replayed over old dates.
+
+Usage:
+    python backfill.py                 # reprocess what changed
+    python backfill.py --force         # reprocess everything
+    python backfill.py --workers 4 --since 20251101
+"""
+
+import os
+import csv
+import json
+import hashlib
+import inspect
+import argparse
+import pathlib
+import importlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any
+
+import snapshot_store
+
+ROOT = pathlib.Path(__file__).parent.resolve()
+DATA_DIR = ROOT / "data"
+STATE_PATH = DATA_DIR / "backfill_state.json"
+SUMMARY_PATH = DATA_DIR / "daily_summary.csv"
+
+# Any change in these functions means derived outputs may differ -> reprocess
+CODE_FUNCTIONS = {
+    "backfill": ["process_day"],
+    "crypto_prices_to_csv": ["build_chart"],
+    "weather_trend_chart": [
+        "find_weather_files", "read_temp_from_csv", "collect_last_n_temperatures",
+        "collect_daily_temperatures", "collect_recent_temperatures", "build_and_save_chart",
+    ],
+    "rollups": ["bucket_start", "read_rollup"],
+    "email_html_report": ["read_repos_latest", "read_weather_latest", "read_crypto_latest"],
+    "snapshot_store": ["read_rows", "read_bytes", "list_snapshots"],
+}
+# Config that ends up in chart titles/file names
+CODE_SETTINGS = {"crypto_prices_to_csv": ["COIN", "CURR", "DAYS"]}
+WEATHER_WINDOW = 7  # same as weather_trend_chart's default
+SUMMARY_FIELDS = [
+    "date", "repos", "stars",
+    "crypto_latest", "crypto_min", "crypto_max", "crypto_points",
+    "temp", "weather_desc",
+]
+
+def date_of(path: pathlib.Path) -> str:
+    """data/weather_Noida_IN_20251113.csv -> '20251113' ('' if not dated)."""
+    tail = path.stem.rsplit("_", 1)[-1]
+    return tail if len(tail) == 8 and tail.isdigit() else ""
+
+def code_version() -> str:
+    h = hashlib.sha256(repr(SUMMARY_FIELDS).encode())
+    for module_name, funcs in sorted(CODE_FUNCTIONS.items()):
+        module = importlib.import_module(module_name)
+        for func in funcs:
+            h.update(inspect.getsource(getattr(module, func)).encode())
+        for setting in CODE_SETTINGS.get(module_name, []):
+            h.update(repr(getattr(module, setting)).encode())
+    return h.hexdigest()[:16]
+
+def discover(coin: str, curr: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Group dated inputs by day: {day: {"repos": [...], "weather": [...], "crypto": [...]}}.
+    The weather list holds the trailing window the trend chart for that day reads.
+    """
+    by_day: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: {"repos": [], "weather": [], "crypto": []})
+    for p in snapshot_store.list_snapshots("github_repos_*_*.csv"):
+        if date_of(p):
+            by_day[date_of(p)]["repos"].append(p.name)
+    for p in sorted(DATA_DIR.glob(f"crypto_{coin}_{curr}_*.csv")):
+        if date_of(p):
+            by_day[date_of(p)]["crypto"].append(p.name)
+
+    weather = [p for p in snapshot_store.list_snapshots("weather_*_*.csv") if date_of(p)]
+    for p in weather:
+        by_day[date_of(p)]  # make sure weather-only days show up
+    for day, inputs in by_day.items():
+        window = [p for p in weather if date_of(p) <= day][-WEATHER_WINDOW:]
+        inputs["weather"] = [p.name for p in window]
+    return dict(by_day)
+
+def fingerprint(inputs: Dict[str, List[str]], version: str) -> str:
+    h = hashlib.sha256(version.encode())
+    for kind in sorted(inputs):
+        for name in inputs[kind]:
+            h.update(name.encode())
+            h.update(snapshot_store.read_bytes(DATA_DIR / name))
+    return h.hexdigest()
+
+def load_state() -> Dict[str, Any]:
+    if STATE_PATH.is_file():
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {"dates": {}}
+
+def save_state(state: Dict[str, Any]) -> None:
+    # write-then-rename so a crash never leaves a half-written checkpoint
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+# ---------- worker (runs in a child process) ----------
+def process_day(day: str, inputs: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Regenerate charts for one day and return its aggregate row."""
+    # Imported inside the worker so the chart modules load in each child process
+    import crypto_prices_to_csv as crypto
+    import weather_trend_chart as weather_chart
+    from email_html_report import read_repos_latest, read_weather_latest, read_crypto_latest
+
+    summary: Dict[str, Any] = {"date": f"{day[:4]}-{day[4:6]}-{day[6:]}"}
+
+    repos, stars = 0, 0
+    for name in inputs["repos"]:
+        result = read_repos_latest(name, top_n=0)
+        if result:
+            repos += result[1]
+            stars += result[2]
+    summary.update({"repos": repos, "stars": stars})
+
+    if inputs["crypto"]:
+        name = inputs["crypto"][-1]
+        with open(DATA_DIR / name, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        if rows:
+            crypto.build_chart(rows, crypto.CHARTS_DIR / f"{pathlib.Path(name).stem}.png")
+        stats = read_crypto_latest(name, crypto.CURR)
+        summary.update({
+            "crypto_latest": stats.get("latest_price"),
+            "crypto_min": stats.get("min_price"),
+            "crypto_max": stats.get("max_price"),
+            "crypto_points": stats.get("count"),
+        })
+
+    if inputs["weather"]:
+        try:
+            # same daily means as the live chart, with the window ending on this day
+            points = weather_chart.collect_recent_temperatures(WEATHER_WINDOW, until=day)
+            weather_chart.build_and_save_chart(points, day=day)
+        except SystemExit as e:
+            print(f"{day}: weather chart skipped ({e})")
+        today_files = [n for n in inputs["weather"] if date_of(pathlib.Path(n)) == day]
+        if today_files:
+            row = read_weather_latest(today_files[-1])
+            summary.update({"temp": row.get("temp"), "weather_desc": row.get("weather_desc")})
+
+    return summary
+
+def write_summary(state: Dict[str, Any]) -> None:
+    rows = [state["dates"][d]["summary"] for d in sorted(state["dates"])]
+    if not rows:
+        return
+    with open(SUMMARY_PATH, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reprocess dated snapshots in data/.")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the checkpoint and redo every date")
+    parser.add_argument("--since", default="", help="only dates >= YYYYMMDD")
+    args = parser.parse_args()
+
+    from crypto_prices_to_csv import COIN, CURR
+
+    version = code_version()
+    state = load_state()
+    days = discover(COIN, CURR)
+
+    todo = {}
+    for day, inputs in sorted(days.items()):
+        if day < args.since:
+            continue
+        fp = fingerprint(inputs, version)
+        done = state["dates"].get(day)
+        if not args.force and done and done.get("fingerprint") == fp:
+            continue
+        todo[day] = (inputs, fp)
+
+    print(f"Backfill: {len(todo)} of {len(days)} date(s) to reprocess (code {version})")
+    if todo:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(process_day, day, inputs): day for day, (inputs, _) in todo.items()}
+            for fut in as_completed(futures):
+                day = futures[fut]
+                try:
+                    summary = fut.result()
+                except Exception as e:
+                    print(f"{day}: failed ({e})")
+                    continue
+                # checkpoint each finished date right away so a restart resumes here
+                state["dates"][day] = {"fingerprint": todo[day][1], "summary": summary}
+                save_state(state)
+                print(f"{day}: done")
+
+    write_summary(state)
+    print(f"Saved {SUMMARY_PATH.name} ({len(state['dates'])} date(s))")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import time
 from datetime import datetime
 import requests
 import pathlib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 # Charting
@@ -12,11 +12,16 @@ import matplotlib
 matplotlib.use("Agg") # render without a GUI
 import matplotlib.pyplot as plt
 
+import rollups
+import summary_state
+
 # 1) Load config
 load_dotenv()
 COIN = os.getenv("CRYPTO_COIN", "bitcoin")
 CURR = os.getenv("CRYPTO_CURRENCY", "inr")
 DAYS = os.getenv("CRYPTO_DAYS", "7")
+# Optional long-range charts served from the rollup tiers, e.g. "30,90,365"
+HISTORY_DAYS = [int(d) for d in os.getenv("CRYPTO_HISTORY_DAYS", "").split(",") if d.strip()]
 
 ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "data"
@@ -31,61 +36,98 @@ URL = f"{BASE}/{COIN}/market_chart"
 params = {"vs_currency": CURR, "days": DAYS}
 
 # 3) Call the API with basic headers + timeout
-resp = requests.get(URL, params=params, headers={"Accept": "application/json", "User-Agent": "api-playground"}, timeout=30)
-
-if resp.status_code != 200:
-    raise SystemExit(f"[{resp.status_code}] CoinGecko error: {resp.text[:300]}")
-
-payload: Dict[str, Any] = resp.json()
-
-# 4) The 'prices' array -> list of [timestamp_ms, price]
-raw_prices = payload.get("prices", [])
-if not raw_prices:
-    raise SystemExit("No 'prices' in CoinGecko response.")
-
-# 5) Transform to rows from csv (ISO time + numeric price)
-rows: List[Dict[str, Any]] = []
-for ts_ms, price in raw_prices:
-    # convert ms -> seconds, then to ISO local time for readability
-    ts = int(ts_ms) // 1000
-    iso = datetime.fromtimestamp(ts).isoformat(timespec="seconds")
-    rows.append({"timestamp": ts, "iso_time": iso, f"price_{CURR}": float(price)})
-    
-# 6) Decide filenames (dated + latest)
-today = datetime.now().strftime("%Y%m%d")
-csv_name = f"crypto_{COIN}_{CURR}_{today}.csv"
-png_name = f"crypto_{COIN}_{CURR}_{today}.png"
-
-csv_path = DATA_DIR / csv_name
-csv_latest = DATA_DIR / "crypto_latest.csv"
-png_path = CHARTS_DIR / png_name
-png_latest = CHARTS_DIR / "crypto_latest.png"
-
-# 7) Save csv (dated snapshot)
-with open(csv_path, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-    writer.writeheader()
-    writer.writerows(rows)
-    
-# Also overwrite a rolling 'latest' file (useful for the email)
-with open(csv_latest, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-    writer.writeheader()
-    writer.writerows(rows)
-    
+def fetch_prices(session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
+    resp = (session or requests).get(URL, params=params, headers={"Accept": "application/json", "User-Agent": "api-playground"}, timeout=30)
+
+    if resp.status_code != 200:
+        raise SystemExit(f"[{resp.status_code}] CoinGecko error: {resp.text[:300]}")
+
+    payload: Dict[str, Any] = resp.json()
+
+    # 4) The 'prices' array -> list of [timestamp_ms, price]
+    raw_prices = payload.get("prices", [])
+    if not raw_prices:
+        raise SystemExit("No 'prices' in CoinGecko response.")
+
+    # 5) Transform to rows from csv (ISO time + numeric price)
+    rows: List[Dict[str, Any]] = []
+    for ts_ms, price in raw_prices:
+        # convert ms -> seconds, then to ISO local time for readability
+        ts = int(ts_ms) // 1000
+        iso = datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+        rows.append({"timestamp": ts, "iso_time": iso, f"price_{CURR}": float(price)})
+    return rows
+
+def save_rows(rows: List[Dict[str, Any]], path: pathlib.Path) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
 # 8) Build the chart (time on X, price on Y)
 #    Keep it clean and readable; no seaborn.
-x = [datetime.fromtimestamp(r["timestamp"]) for r in rows]
-y = [r[f"price_{CURR}"] for r in rows]
-
-plt.figure(figsize=(8,3))
-plt.plot(x, y, linewidth=2)
-plt.title(f"{COIN.capitalize()} price ({CURR.upper()}) - last {DAYS} day(s)")
-plt.xlabel("Time")
-plt.ylabel(f"Price ({CURR.upper()})")
-plt.tight_layout()
-plt.savefig(png_path, dpi=120)
-plt.savefig(png_latest, dpi=120)
-plt.close()
-
-print(f"Saved: {csv_path.name} and chart {png_path.name}")
+def build_chart(rows: List[Dict[str, Any]], *png_paths: pathlib.Path) -> None:
+    x = [datetime.fromtimestamp(int(r["timestamp"])) for r in rows]
+    y = [float(r[f"price_{CURR}"]) for r in rows]
+
+    plt.figure(figsize=(8,3))
+    plt.plot(x, y, linewidth=2)
+    plt.title(f"{COIN.capitalize()} price ({CURR.upper()}) - last {DAYS} day(s)")
+    plt.xlabel("Time")
+    plt.ylabel(f"Price ({CURR.upper()})")
+    plt.tight_layout()
+    for path in png_paths:
+        plt.savefig(path, dpi=120)
+    plt.close()
+
+# 6) Decide filenames (dated + latest) and save csv
+def save_snapshots(rows: List[Dict[str, Any]]) -> pathlib.Path:
+    today = datetime.now().strftime("%Y%m%d")
+    csv_path = DATA_DIR / f"crypto_{COIN}_{CURR}_{today}.csv"
+    csv_latest = DATA_DIR / "crypto_latest.csv"
+
+    # 7) Save csv (dated snapshot)
+    save_rows(rows, csv_path)
+
+    # Also overwrite a rolling 'latest' file (useful for the email)
+    save_rows(rows, csv_latest)
+
+    # Fold the new points into the hourly/daily tiers
+    rollups.update_rollups(rollups.crypto_series(), [(r["timestamp"], r[f"price_{CURR}"]) for r in rows])
+
+    # latest/min/max for the report, computed once here instead of on every read
+    summary_state.update_section("crypto", summary_state.crypto_section(rows, CURR))
+    return csv_path
+
+def save_charts(rows: List[Dict[str, Any]]) -> pathlib.Path:
+    today = datetime.now().strftime("%Y%m%d")
+    png_path = CHARTS_DIR / f"crypto_{COIN}_{CURR}_{today}.png"
+    png_latest = CHARTS_DIR / "crypto_latest.png"
+    build_chart(rows, png_path, png_latest)
+    return png_path
+
+def save_history_chart(days: int) -> pathlib.Path:
+    """Close price over a long window, read from the pre-aggregated rollups."""
+    tier = rollups.tier_for(days)
+    buckets = rollups.read_rollup(rollups.crypto_series(), tier, days=days)
+    png_path = CHARTS_DIR / f"crypto_{COIN}_{CURR}_{days}d.png"
+
+    plt.figure(figsize=(8,3))
+    plt.plot([datetime.fromtimestamp(b["bucket_start"]) for b in buckets], [b["close"] for b in buckets], linewidth=2)
+    plt.fill_between([datetime.fromtimestamp(b["bucket_start"]) for b in buckets],
+                     [b["low"] for b in buckets], [b["high"] for b in buckets], alpha=0.2)
+    plt.title(f"{COIN.capitalize()} price ({CURR.upper()}) - last {days} day(s), {tier}")
+    plt.xlabel("Time")
+    plt.ylabel(f"Price ({CURR.upper()})")
+    plt.tight_layout()
+    plt.savefig(png_path, dpi=120)
+    plt.close()
+    return png_path
+
+if __name__ == "__main__":
+    rows = fetch_prices()
+    csv_path = save_snapshots(rows)
+    png_path = save_charts(rows)
+    for days in HISTORY_DAYS:
+        save_history_chart(days)
+    print(f"Saved: {csv_path.name} and chart {png_path.name}")
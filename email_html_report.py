@@ -12,6 +12,10 @@ from dotenv import load_dotenv
 from datetime import datetime
 import pathlib
 
+import rollups
+import summary_state
+import snapshot_store
+
 load_dotenv()
 SENDER = os.getenv("MAIL_SENDER")
 APP_PASS = os.getenv("MAIL_APP_PASSWORD")
@@ -26,24 +30,18 @@ CHARTS = ROOT / "charts"
 def read_repos_latest(path: str, top_n: int = 5):
     rows = []
     p = DATA / path
-    if not p.is_file():
+    if not snapshot_store.exists(p):
         return rows
-    with open(p, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            row["stargazers_count"] = int(row.get("stargazers_count") or 0)
-            rows.append(row)
+    for row in snapshot_store.read_rows(p):
+        row["stargazers_count"] = int(row.get("stargazers_count") or 0)
+        rows.append(row)
     rows.sort(key=lambda r: r["stargazers_count"], reverse=True)
     return rows[:top_n], len(rows), sum(row["stargazers_count"] for row in rows)
 
 def read_weather_latest(path: str):
     p = DATA / path
-    if not p.is_file():
-        return {}
-    with open(p, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            return row
+    for row in snapshot_store.read_rows(p):
+        return row
     return {}
 
 def read_crypto_latest(path: str, curr: str):
@@ -68,21 +66,62 @@ def read_crypto_latest(path: str, curr: str):
         "count": len(prices),
     }
 
+def read_crypto_window(days: int):
+    """
+    min/max/mean/open/close over the last `days` days from the rollup tiers,
+    a few hundred rows at most regardless of how much raw history exists.
+    """
+    buckets = rollups.read_rollup(rollups.crypto_series(), rollups.tier_for(days), days=days)
+    if not buckets:
+        return {}
+    count = sum(b["count"] for b in buckets)
+    return {
+        "days": days,
+        "open_price": buckets[0]["open"],
+        "close_price": buckets[-1]["close"],
+        "min_price": min(b["low"] for b in buckets),
+        "max_price": max(b["high"] for b in buckets),
+        "mean_price": sum(b["sum"] for b in buckets) / count,
+        "count": count,
+    }
+
+def load_report_inputs(curr: str):
+    """
+    Report KPIs from data/summary.json, which the fetchers keep up to date.
+    Sections missing from it (e.g. before the first fetch) fall back to the CSV readers.
+    Returns (top_repos, totals, weather, crypto).
+    """
+    summary = summary_state.load_summary()
+
+    repos = summary.get("repos")
+    if repos:
+        top_repos, total_repos, total_stars = repos["top_repos"], repos["total_repos"], repos["total_stars"]
+    else:
+        top_repos, total_repos, total_stars = read_repos_latest("github_repos_latest.csv", top_n=summary_state.TOP_N) or ([], 0, 0)
+
+    weather = summary.get("weather") or read_weather_latest("weather_latest.csv")
+    crypto = summary.get("crypto") or read_crypto_latest("crypto_latest.csv", curr=curr)
+    return top_repos, {"repos": total_repos, "stars": total_stars}, weather, crypto
+
 # ---------- attachments ----------
-def attach_file(msg: MIMEMultipart, filepath: pathlib.Path) -> None:
-    if not filepath.is_file():
-        return
-    ctype, encoding = mimetypes.guess_type(str(filepath))
+def attach_bytes(msg: MIMEMultipart, filename: str, data: bytes) -> None:
+    ctype, encoding = mimetypes.guess_type(filename)
     if ctype is None or encoding is not None:
         ctype = "application/octet-stream"
     maintype, subtype = ctype.split("/", 1)
-    with open(filepath, "rb") as f:
-        part = MIMEBase(maintype, subtype)
-        part.set_payload(f.read())
+    part = MIMEBase(maintype, subtype)
+    part.set_payload(data)
     encoders.encode_base64(part)
-    part.add_header("Content-Disposition", f'attachment; filename="{filepath.name}"')
+    part.add_header("Content-Disposition", f'attachment; filename="{filename}"')
     msg.attach(part)
 
+def attach_file(msg: MIMEMultipart, filepath: pathlib.Path) -> None:
+    # latest CSVs may be pointers into the snapshot store rather than real files
+    data = snapshot_store.read_bytes(filepath)
+    if not data:
+        return
+    attach_bytes(msg, filepath.name, data)
+
 def attach_inline_image(msg_root: MIMEMultipart, img_path: pathlib.Path, cid: str) -> None:
     if not img_path.is_file():
         return
@@ -93,7 +132,9 @@ def attach_inline_image(msg_root: MIMEMultipart, img_path: pathlib.Path, cid: st
     msg_root.attach(img)
 
 # ---------- html builder ----------
-def build_html(headline, top_repos, totals, weather, crypto, curr: str):
+def build_html(headline, top_repos, totals, weather, crypto, curr: str, chart_src=None):
+    # Inline images use Content-ID by default; the HTTP server passes real URLs
+    chart_src = chart_src or {"weather_chart": "cid:weather_chart", "crypto_chart": "cid:crypto_chart"}
     today = datetime.now().strftime("%Y-%m-%d %H:%M")
     style = """
       body{font-family:Arial,Helvetica,sans-serif;margin:0;padding:0;background:#f6f8fb;}
@@ -153,7 +194,7 @@ def build_html(headline, top_repos, totals, weather, crypto, curr: str):
             <h2>🌡️ 7-Day Temp Trend</h2>
             <p class="muted">Recent 7-day temperature snapshot.</p>
             <div style="margin-top:8px">
-              <img src="cid:weather_chart" alt="Weather trend" style="max-width:100%;border:1px solid #eee;border-radius:8px"/>
+              <img src="{chart_src['weather_chart']}" alt="Weather trend" style="max-width:100%;border:1px solid #eee;border-radius:8px"/>
             </div>
           </div>
 
@@ -161,7 +202,7 @@ def build_html(headline, top_repos, totals, weather, crypto, curr: str):
             <h2>₿ Crypto ({curr.upper()})</h2>
             <p class="muted">Inline image below is attached via Content-ID.</p>
             <div style="margin-top:8px">
-              <img src="cid:crypto_chart" alt="Crypto chart" style="max-width:100%;border:1px solid #eee;border-radius:8px"/>
+              <img src="{chart_src['crypto_chart']}" alt="Crypto chart" style="max-width:100%;border:1px solid #eee;border-radius:8px"/>
             </div>
           </div>
 
@@ -188,12 +229,8 @@ def send_html_report() -> None:
     if not SENDER or not APP_PASS:
         raise SystemExit("Missing MAIL_SENDER or MAIL_APP_PASSWORD in .env")
 
-    # Load data from latest snapshots
-    top_repos, total_repos, total_stars = read_repos_latest("github_repos_latest.csv", top_n=5)
-    weather = read_weather_latest("weather_latest.csv")
-    crypto = read_crypto_latest("crypto_latest.csv", curr=CURR)
-
-    totals = {"repos": total_repos, "stars": total_stars}
+    # Load KPIs from the persisted summary (no CSV re-parsing)
+    top_repos, totals, weather, crypto = load_report_inputs(CURR)
     headline = "Daily HTML Report: GitHub, Weather & Crypto"
 
     plain = "Daily report attached: github_repos_latest.csv, weather_latest.csv, crypto_latest.csv\n"
@@ -0,0 +1,244 @@
+"""
+github_accounts_to_csv.py
+- Collects profiles + repos for many GitHub users/orgs in one go
+- Uses the GraphQL API: several accounts per request (aliases), cursor pagination,
+  and only the fields that simplify() needs
+- Runs batches in parallel; requests in flight = what the GraphQL point budget
+  (rateLimit.remaining / cost per request) allows, capped at GITHUB_GRAPHQL_WORKERS
+- Writes one dated repos snapshot per account + combined profile/repo snapshots,
+  all through the snapshot store (latest files are pointers)
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import requests
+from dotenv import load_dotenv
+
+import snapshot_store
+from github_repos_to_csv import DATA_DIR, simplify, save_csv
+
+# 1) Load config from .env
+load_dotenv()
+ACCOUNTS = [a.strip() for a in os.getenv("GITHUB_ACCOUNTS", os.getenv("GITHUB_USERNAME", "vishalsinhacodes")).split(",") if a.strip()]
+TOKEN = os.getenv("GITHUB_TOKEN")  # required: GraphQL does not allow anonymous calls
+BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH", "5"))      # accounts (aliases) per request
+MAX_WORKERS = int(os.getenv("GITHUB_GRAPHQL_WORKERS", "4"))   # upper bound on requests in flight
+MIN_POINTS = int(os.getenv("GITHUB_GRAPHQL_MIN_POINTS", "50"))  # points to keep in reserve
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# 2) Only what simplify() and the profile summary read
+REPO_FIELDS = """
+  name nameWithOwner url description isPrivate
+  primaryLanguage { name }
+  stargazerCount forkCount
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+  createdAt updatedAt pushedAt diskUsage
+"""
+
+PROFILE_FIELDS = """
+  login url
+  ... on User { name followers { totalCount } following { totalCount } }
+  ... on Organization { name }
+"""
+
+class PointBudget:
+    """
+    Limits requests in flight by the GraphQL rate limit reported in responses.
+    Capacity = (remaining - min_points) // cost of the last request, capped at
+    max_in_flight. Before the first response the cost is unknown, so a single
+    request probes it. With no capacity left, workers wait for the window to reset.
+    """
+
+    def __init__(self, min_points: int, max_in_flight: int) -> None:
+        self.min_points = min_points
+        self.max_in_flight = max_in_flight
+        self.remaining: Optional[int] = None
+        self.cost = 1
+        self.reset_at: Optional[float] = None
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def capacity(self) -> int:
+        if self.remaining is None:
+            return 1
+        return max(0, min(self.max_in_flight, (self.remaining - self.min_points) // max(self.cost, 1)))
+
+    def acquire(self) -> None:
+        with self.cond:
+            while self.in_flight >= self.capacity():
+                if self.in_flight == 0:
+                    # budget spent and nobody will report a new one: wait for the reset
+                    wait_sec = max(0, (self.reset_at or time.time()) - time.time()) + 1
+                    print(f"GraphQL budget low ({self.remaining} points). Waiting ~{int(wait_sec)} seconds.")
+                    self.cond.wait(wait_sec)  # releases the lock while sleeping
+                    self.remaining = None
+                else:
+                    self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, rate: Dict[str, Any]) -> None:
+        with self.cond:
+            self.in_flight -= 1
+            if rate:
+                self.remaining = rate.get("remaining")
+                self.cost = rate.get("cost") or self.cost
+                reset = rate.get("resetAt")
+                if reset:
+                    self.reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00")).timestamp()
+            self.cond.notify_all()
+
+# 3) One request = many aliased accounts
+def build_query(batch: List[Tuple[str, Optional[str]]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    batch: list of (login, cursor). cursor=None means first page (profile included).
+    Returns the query text and its variables.
+    """
+    var_defs = []
+    parts = []
+    variables: Dict[str, Any] = {}
+    for i, (login, cursor) in enumerate(batch):
+        var_defs.append(f"$l{i}: String!, $c{i}: String")
+        variables[f"l{i}"] = login
+        variables[f"c{i}"] = cursor
+        profile = PROFILE_FIELDS if cursor is None else "login"
+        parts.append(f"""
+          a{i}: repositoryOwner(login: $l{i}) {{
+            {profile}
+            repositories(first: 100, after: $c{i}, ownerAffiliations: OWNER,
+                         orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+              totalCount
+              pageInfo {{ hasNextPage endCursor }}
+              nodes {{ {REPO_FIELDS} }}
+            }}
+          }}""")
+    query = f"query({', '.join(var_defs)}) {{ rateLimit {{ cost remaining resetAt }} {''.join(parts)} }}"
+    return query, variables
+
+def post_graphql(session: requests.Session, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    headers = {
+        "Authorization": f"Bearer {TOKEN}",
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "api-playground",
+    }
+    resp = session.post(GRAPHQL_URL, json={"query": query, "variables": variables}, headers=headers, timeout=30)
+
+    if resp.status_code == 401:
+        raise SystemExit("[401] Bad credentials. Check GITHUB_TOKEN in .env")
+
+    if resp.status_code in (403, 429):
+        raise SystemExit(f"[{resp.status_code}] Rate limited: {resp.text[:300]}")
+
+    if resp.status_code != 200:
+        raise SystemExit(f"[{resp.status_code}] Unexpected error: {resp.text[:300]}")
+
+    payload = resp.json()
+    # Unknown logins come back as NOT_FOUND errors next to partial data; keep going
+    for err in payload.get("errors") or []:
+        if err.get("type") != "NOT_FOUND":
+            raise SystemExit(f"GraphQL error: {err.get('message')}")
+        print(f"Skipping: {err.get('message')}")
+    return payload.get("data") or {}
+
+# 4) Map a GraphQL repo node to the REST shape simplify() expects
+def to_rest_shape(node: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": node.get("name"),
+        "full_name": node.get("nameWithOwner"),
+        "html_url": node.get("url"),
+        "description": node.get("description"),
+        "private": node.get("isPrivate"),
+        "language": (node.get("primaryLanguage") or {}).get("name"),
+        "stargazers_count": node.get("stargazerCount"),
+        "forks_count": node.get("forkCount"),
+        # REST counts open PRs as issues too
+        "open_issues_count": (node.get("issues") or {}).get("totalCount", 0)
+        + (node.get("pullRequests") or {}).get("totalCount", 0),
+        "created_at": node.get("createdAt"),
+        "updated_at": node.get("updatedAt"),
+        "pushed_at": node.get("pushedAt"),
+        "size": node.get("diskUsage"),
+    }
+
+def profile_row(owner: Dict[str, Any]) -> Dict[str, Any]:
+    repos = owner.get("repositories") or {}
+    return {
+        "login": owner.get("login"),
+        "name": owner.get("name"),
+        "type": "user" if "followers" in owner else "organization",
+        "repos_owned": repos.get("totalCount"),
+        "followers": (owner.get("followers") or {}).get("totalCount"),
+        "following": (owner.get("following") or {}).get("totalCount"),
+        "html_url": owner.get("url"),
+        "snapshot_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+# 5) Fetch everything: first pages for all accounts, then follow-up pages, batched
+def fetch_accounts(accounts: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    if not TOKEN:
+        raise SystemExit("Missing GITHUB_TOKEN in .env (required for the GraphQL API)")
+
+    budget = PointBudget(MIN_POINTS, MAX_WORKERS)
+    session = requests.Session()
+    profiles: Dict[str, Dict[str, Any]] = {}
+    repos: Dict[str, List[Dict[str, Any]]] = {}
+    requests_made = 0
+
+    def run_batch(batch: List[Tuple[str, Optional[str]]]) -> Tuple[List[Tuple[str, Optional[str]]], Dict[str, Any]]:
+        budget.acquire()
+        data: Dict[str, Any] = {}
+        try:
+            query, variables = build_query(batch)
+            data = post_graphql(session, query, variables)
+        finally:
+            budget.release(data.get("rateLimit") or {})
+        return batch, data
+
+    pending: List[Tuple[str, Optional[str]]] = [(a, None) for a in accounts]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while pending:
+            batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+            pending = []
+            for batch, data in pool.map(run_batch, batches):
+                requests_made += 1
+                for i, (login, cursor) in enumerate(batch):
+                    owner = data.get(f"a{i}")
+                    if not owner:
+                        continue
+                    if cursor is None:
+                        profiles[login] = profile_row(owner)
+                    conn = owner.get("repositories") or {}
+                    repos.setdefault(login, []).extend(to_rest_shape(n) for n in conn.get("nodes") or [])
+                    page = conn.get("pageInfo") or {}
+                    if page.get("hasNextPage"):
+                        pending.append((login, page.get("endCursor")))
+
+    print(f"GraphQL requests: {requests_made} for {len(accounts)} account(s)")
+    return [profiles[a] for a in accounts if a in profiles], repos
+
+# 6) Main
+if __name__ == "__main__":
+    print(f"Fetching {len(ACCOUNTS)} account(s): {', '.join(ACCOUNTS)}")
+    profiles, repos = fetch_accounts(ACCOUNTS)
+
+    today = datetime.now().strftime("%Y%m%d")
+    all_rows: List[Dict[str, Any]] = []
+    for login, raw in repos.items():
+        rows = [simplify(r) for r in raw]
+        save_csv(rows, DATA_DIR / f"github_repos_{login}_{today}.csv")
+        all_rows.extend(rows)
+
+    # Combined snapshots go through the store too; latest is a pointer, not a copy
+    for rows, name in ((profiles, "github_profiles"), (all_rows, "github_accounts_repos")):
+        if rows:
+            dated = DATA_DIR / f"{name}_{today}.csv"
+            save_csv(rows, dated)
+            snapshot_store.point_latest(DATA_DIR / f"{name}_latest.csv", dated)
+
+    stars = sum(int(r["stargazers_count"] or 0) for r in all_rows)
+    print(f"Saved GitHub snapshots for {len(profiles)} account(s) | repos={len(all_rows)}, stars={stars}")
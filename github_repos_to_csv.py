@@ -1,12 +1,14 @@
 import os 
-import csv
 import time
 import pathlib
 from datetime import datetime
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
+import summary_state
+import snapshot_store
+
 # 1) Load config from .env
 load_dotenv()
 USERNAME = os.getenv("GITHUB_USERNAME", "vishalsinhacodes")
@@ -17,7 +19,7 @@ DATA_DIR = ROOT / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
 # 2) Helper: Get with headers
-def get(url: str) -> requests.Response:
+def get(url: str, session: Optional[requests.Session] = None) -> requests.Response:
     headers = {
         "Accept": "application/vnd.github.json",
         "User-Agent": USERNAME or "api-playground",
@@ -25,17 +27,18 @@ def get(url: str) -> requests.Response:
     # If you later add a token, include it for higher rate limits
     if TOKEN:
         headers["Authorization"] = f"Bearer {TOKEN}"
-    return requests.get(url, headers=headers, timeout=20)
+    # A shared session keeps the TLS connection alive between calls
+    return (session or requests).get(url, headers=headers, timeout=20)
 
 # 3) Fetch all repos (handles pagination)
-def fetch_all_repos(user: str) -> List[Dict[str, Any]]:
+def fetch_all_repos(user: str, session: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
     repos: List[Dict[str, Any]] = []
     page = 1
     per_page = 100  # max allowed by GitHub
 
     while True:
         url = f"https://api.github.com/users/{user}/repos?per_page={per_page}&page={page}&type=owner&sort=updated"
-        resp = get(url)
+        resp = get(url, session)
 
         if resp.status_code == 403:
             reset = resp.headers.get("x-ratelimit-reset")
@@ -87,12 +90,24 @@ def save_csv(rows: List[Dict[str, Any]], path: str) -> None:
     if not rows:
         print("No repos found. Did you push Any")
         return
-    fieldnames = list(rows[0].keys())
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    # Unchanged repo sets (apart from snapshot_date) share one stored blob
+    snapshot_store.write_snapshot(path, rows, snapshot_store.REPOS_VOLATILE)
     
+# Dated + latest filenames
+def save_snapshots(rows: List[Dict[str, Any]]) -> pathlib.Path:
+    today = datetime.now().strftime("%Y%m%d")
+    dated = DATA_DIR / f"github_repos_{USERNAME}_{today}.csv"
+    latest = DATA_DIR / f"github_repos_latest.csv"
+
+    save_csv(rows, dated)
+    if rows:
+        snapshot_store.point_latest(latest, dated)
+
+    # Keep totals + top repos in the report summary while the rows are in memory
+    if rows:
+        summary_state.update_section("repos", summary_state.repos_section(rows))
+    return dated
+
 # 6) Pretty print top 5 by stars and recent update
 def print_summaries(rows: List[Dict[str, Any]]) -> None:
     if not rows:
@@ -118,14 +133,7 @@ if __name__ == "__main__":
     print(f"Fetching repos for : {USERNAME}")
     repos = fetch_all_repos(USERNAME)
     rows = [simplify(r) for r in repos]
-    
-    # Dated + latest filenames
-    today = datetime.now().strftime("%Y%m%d")
-    dated = DATA_DIR / f"github_repos_{USERNAME}_{today}.csv"
-    latest = DATA_DIR / f"github_repos_latest.csv"
-
-    save_csv(rows, dated)
-    save_csv(rows, latest)
+    dated = save_snapshots(rows)
     
     # Keep a simple "current summary" alongside (optional helper)
     total = len(rows)
@@ -0,0 +1,179 @@
+"""
+report_daemon.py
+- Long-running alternative to firing run_daily_report.py once a day
+- Imports every step once and reuses one HTTP session (keep-alive) per source
+- Refreshes each source on its own interval (+/- jitter) instead of one shared cadence
+- A source that is still running when it comes due again is skipped, not queued twice
+- Every fetch is saved (dated snapshot, summary); charts and the email are only
+  rebuilt/sent when the fetched data actually changed
+
+Usage:
+    python report_daemon.py
+    python run_daily_report.py --daemon
+"""
+
+import os
+import time
+import heapq
+import random
+import hashlib
+import json
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Any, Iterable, List, Optional
+import requests
+from dotenv import load_dotenv
+
+import github_repos_to_csv as repos_job
+import weather_current_to_csv as weather_job
+import crypto_prices_to_csv as crypto_job
+import weather_trend_chart
+import email_html_report
+import snapshot_store
+
+# 1) Load config from .env (seconds)
+load_dotenv()
+INTERVALS = {
+    "repos": int(os.getenv("DAEMON_REPOS_INTERVAL", "86400")),
+    "weather": int(os.getenv("DAEMON_WEATHER_INTERVAL", "3600")),
+    "crypto": int(os.getenv("DAEMON_CRYPTO_INTERVAL", "300")),
+    "email": int(os.getenv("DAEMON_EMAIL_INTERVAL", "86400")),
+}
+JITTER = float(os.getenv("DAEMON_JITTER", "0.1"))  # +/- fraction of each interval
+
+def log(msg: str) -> None:
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {msg}", flush=True)
+
+def fingerprint(rows: List[Dict[str, Any]], volatile: Iterable[str] = ()) -> str:
+    """Hash the fetched rows, ignoring volatile columns (the same ones the store ignores)."""
+    clean = [{k: v for k, v in r.items() if k not in volatile} for r in rows]
+    return hashlib.sha256(json.dumps(clean, sort_keys=True, default=str).encode()).hexdigest()
+
+class Source:
+    """One upstream API: how to fetch it, how to save it, what depends on it."""
+
+    def __init__(self, name: str, fetch: Callable[[requests.Session], List[Dict[str, Any]]],
+                 save: Callable[[List[Dict[str, Any]]], Any],
+                 downstream: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+                 volatile: Iterable[str] = ()) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.save = save
+        self.downstream = downstream
+        self.volatile = tuple(volatile)  # columns that change without the data changing
+        self.session = requests.Session()
+        self.last_hash: Optional[str] = None
+        self.running: Optional[Future] = None
+
+SOURCES = [
+    Source(
+        "repos",
+        fetch=lambda s: [repos_job.simplify(r) for r in repos_job.fetch_all_repos(repos_job.USERNAME, s)],
+        save=repos_job.save_snapshots,
+        volatile=snapshot_store.REPOS_VOLATILE,
+    ),
+    Source(
+        "weather",
+        fetch=lambda s: [weather_job.fetch_weather(s)],
+        save=lambda rows: weather_job.save_weather(rows[0]),
+        downstream=lambda rows: weather_trend_chart.build_and_save_chart(
+            weather_trend_chart.collect_recent_temperatures(weather_trend_chart.TREND_DAYS)),
+        volatile=snapshot_store.WEATHER_VOLATILE,
+    ),
+    Source(
+        "crypto",
+        fetch=crypto_job.fetch_prices,
+        save=crypto_job.save_snapshots,
+        downstream=crypto_job.save_charts,
+    ),
+]
+
+class Daemon:
+    def __init__(self, sources: List[Source]) -> None:
+        self.sources = {s.name: s for s in sources}
+        # fetches run in parallel; charts/email go through a single worker because
+        # pyplot keeps global state and must not be used from two threads at once
+        self.fetchers = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="fetch")
+        self.renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+        self.dirty = False  # any input changed since the last email
+        self.dirty_lock = threading.Lock()
+
+    def next_due(self, name: str) -> float:
+        interval = INTERVALS[name]
+        return time.time() + interval * (1 + random.uniform(-JITTER, JITTER))
+
+    def refresh(self, source: Source) -> None:
+        try:
+            rows = source.fetch(source.session)
+        except (Exception, SystemExit) as e:
+            log(f"{source.name}: fetch failed ({e})")
+            return
+        try:
+            # always save: dated snapshot + summary stay current (cheap with the store)
+            source.save(rows)
+            h = fingerprint(rows, source.volatile)
+        except (Exception, SystemExit) as e:
+            log(f"{source.name}: save failed ({e})")
+            return
+        if h == source.last_hash:
+            log(f"{source.name}: saved {len(rows)} row(s), unchanged, skipping downstream")
+            return
+        source.last_hash = h
+        with self.dirty_lock:
+            self.dirty = True
+        log(f"{source.name}: saved {len(rows)} row(s)")
+        if source.downstream:
+            self.renderer.submit(self.render, source, rows)
+
+    def render(self, source: Source, rows: List[Dict[str, Any]]) -> None:
+        try:
+            source.downstream(rows)
+        except (Exception, SystemExit) as e:
+            log(f"{source.name}: downstream failed ({e})")
+
+    def email(self) -> None:
+        # clear before sending so changes that land during the send aren't lost
+        with self.dirty_lock:
+            dirty, self.dirty = self.dirty, False
+        if not dirty:
+            log("email: no input changed since last report, skipping")
+            return
+        try:
+            email_html_report.send_html_report()
+        except (Exception, SystemExit) as e:
+            log(f"email: failed ({e})")
+            with self.dirty_lock:
+                self.dirty = True
+
+    def run(self) -> None:
+        # everything is due right away on start-up; email waits for one interval
+        queue = [(time.time(), name) for name in self.sources]
+        queue.append((self.next_due("email"), "email"))
+        heapq.heapify(queue)
+        log("Daemon started: " + ", ".join(f"{k}={v}s" for k, v in INTERVALS.items()))
+
+        try:
+            while True:
+                due, name = heapq.heappop(queue)
+                time.sleep(max(0.0, due - time.time()))
+                if name == "email":
+                    self.renderer.submit(self.email)
+                else:
+                    source = self.sources[name]
+                    if source.running and not source.running.done():
+                        log(f"{name}: previous run still in progress, coalescing")
+                    else:
+                        source.running = self.fetchers.submit(self.refresh, source)
+                heapq.heappush(queue, (self.next_due(name), name))
+        except KeyboardInterrupt:
+            log("Stopping daemon...")
+        finally:
+            self.fetchers.shutdown(wait=True)
+            self.renderer.shutdown(wait=True)
+
+def main() -> None:
+    Daemon(SOURCES).run()
+
+if __name__ == "__main__":
+    main()
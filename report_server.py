@@ -0,0 +1,255 @@
+"""
+report_server.py
+- Small read-only HTTP server (asyncio, stdlib only) for the latest snapshots
+- GET /api/repos, /api/weather, /api/crypto  -> JSON summaries
+- GET /api/crypto?days=30                    -> window stats from the rollup tiers
+- GET /report.html                           -> the HTML report, charts linked by URL
+- GET /charts/<name>.png                     -> rendered chart images
+- JSON endpoints read data/summary.json (CSV fallback before the first fetch); parsed
+  data is kept in memory and rebuilt only when those files change;
+  chart PNGs are read from disk per request (ETag from mtime/size), not cached
+- Every response carries an ETag; If-None-Match gets a bodiless 304
+
+Usage:
+    python report_server.py        # http://127.0.0.1:8000/report.html
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import pathlib
+from urllib.parse import urlsplit, parse_qs
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from email_html_report import (
+    DATA, CHARTS, CURR,
+    read_repos_latest, read_weather_latest, read_crypto_latest, read_crypto_window,
+    build_html, load_report_inputs,
+)
+import rollups
+from summary_state import SUMMARY_PATH, TOP_N, load_summary
+from snapshot_store import pointer_path
+
+# 1) Load config from .env
+load_dotenv()
+HOST = os.getenv("REPORT_HOST", "127.0.0.1")
+PORT = int(os.getenv("REPORT_PORT", "8000"))
+CHECK_EVERY = float(os.getenv("REPORT_CHECK_SECONDS", "1"))  # min gap between stat() checks
+
+REPOS_CSV = "github_repos_latest.csv"
+WEATHER_CSV = "weather_latest.csv"
+CRYPTO_CSV = "crypto_latest.csv"
+WINDOWS = (7, 30, 90, 365)  # /api/crypto?days=N values served from the rollups
+
+# ---------- payload builders (run in a thread only when inputs changed) ----------
+# Built from data/summary.json like the report; the CSV readers only cover
+# sections the fetchers haven't written yet.
+def repos_payload() -> Tuple[bytes, str]:
+    section = load_summary().get("repos")
+    if section:
+        top, total, stars = section["top_repos"], section["total_repos"], section["total_stars"]
+    else:
+        top, total, stars = read_repos_latest(REPOS_CSV, top_n=TOP_N) or ([], 0, 0)
+    body = {"top_repos": top, "total_repos": total, "total_stars": stars}
+    return json.dumps(body, default=str).encode(), "application/json"
+
+def weather_payload() -> Tuple[bytes, str]:
+    body = load_summary().get("weather") or read_weather_latest(WEATHER_CSV)
+    return json.dumps(body, default=str).encode(), "application/json"
+
+def crypto_payload() -> Tuple[bytes, str]:
+    section = load_summary().get("crypto") or read_crypto_latest(CRYPTO_CSV, CURR)
+    body = dict(section, currency=CURR)
+    return json.dumps(body).encode(), "application/json"
+
+def crypto_window_payload(days: int) -> Callable[[], Tuple[bytes, str]]:
+    def build() -> Tuple[bytes, str]:
+        body = dict(read_crypto_window(days), currency=CURR)
+        return json.dumps(body).encode(), "application/json"
+    return build
+
+def report_payload() -> Tuple[bytes, str]:
+    top, totals, weather, crypto = load_report_inputs(CURR)
+    html = build_html(
+        "Daily HTML Report: GitHub, Weather & Crypto",
+        top,
+        totals,
+        weather,
+        crypto,
+        curr=CURR,
+        chart_src={
+            "weather_chart": "/charts/weather_trend_latest.png",
+            "crypto_chart": "/charts/crypto_latest.png",
+        },
+    )
+    return html.encode("utf-8"), "text/html; charset=utf-8"
+
+def read_chart(name: str, if_none_match: str) -> Optional[Tuple[str, Optional[bytes]]]:
+    """
+    (etag, body) for charts/<name>, body None when the client's copy is current.
+    None if the chart doesn't exist. Bodies are not kept, so memory doesn't grow
+    with the number of dated charts.
+    """
+    # plain file names only, no sub-dirs or ".."
+    if not name.endswith(".png") or "/" in name or "\\" in name or name.startswith("."):
+        return None
+    p = CHARTS / name
+    try:
+        st = p.stat()
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if etag in if_none_match:
+            return etag, None
+        return etag, p.read_bytes()
+    except FileNotFoundError:
+        return None
+
+# ---------- cache ----------
+class Entry:
+    def __init__(self, build: Callable[[], Tuple[bytes, str]], deps: List[pathlib.Path]) -> None:
+        self.build = build
+        self.deps = deps
+        self.stamp: Optional[tuple] = None
+        self.checked = 0.0
+        self.body = b""
+        self.ctype = ""
+        self.etag = ""
+        self.lock = asyncio.Lock()
+
+    def current_stamp(self) -> tuple:
+        out = []
+        for p in self.deps:
+            try:
+                st = p.stat()
+                out.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                out.append(None)
+        return tuple(out)
+
+    async def get(self) -> "Entry":
+        now = time.monotonic()
+        if self.stamp is not None and now - self.checked < CHECK_EVERY:
+            return self
+        # one rebuild at a time; concurrent clients wait and then reuse the result
+        async with self.lock:
+            now = time.monotonic()
+            if self.stamp is not None and now - self.checked < CHECK_EVERY:
+                return self
+            stamp = self.current_stamp()
+            if stamp != self.stamp:
+                body, ctype = await asyncio.to_thread(self.build)
+                self.body, self.ctype = body, ctype
+                self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                self.stamp = stamp
+            self.checked = time.monotonic()
+        return self
+
+ROUTES: Dict[str, Entry] = {
+    # summary.json first; the CSVs (latest repos/weather may be store pointers) for the fallback
+    "/api/repos": Entry(repos_payload, [SUMMARY_PATH, DATA / REPOS_CSV, pointer_path(DATA / REPOS_CSV)]),
+    "/api/weather": Entry(weather_payload, [SUMMARY_PATH, DATA / WEATHER_CSV, pointer_path(DATA / WEATHER_CSV)]),
+    "/api/crypto": Entry(crypto_payload, [SUMMARY_PATH, DATA / CRYPTO_CSV]),
+    **{
+        f"/api/crypto?days={days}": Entry(
+            crypto_window_payload(days), [rollups.tier_path(rollups.crypto_series(), rollups.tier_for(days))])
+        for days in WINDOWS
+    },
+    "/report.html": Entry(report_payload, [
+        SUMMARY_PATH, DATA / REPOS_CSV, DATA / WEATHER_CSV, DATA / CRYPTO_CSV,
+        pointer_path(DATA / REPOS_CSV), pointer_path(DATA / WEATHER_CSV),
+    ]),
+}
+
+# ---------- HTTP ----------
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
+
+def response(status: int, headers: Dict[str, str], body: bytes = b"", keep_alive: bool = True) -> bytes:
+    head = [f"HTTP/1.1 {status} {REASONS[status]}"]
+    headers = dict(headers)
+    headers.setdefault("Content-Length", str(len(body)))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    head += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+def route_key(target: str) -> str:
+    """Path, plus ?days=N for the crypto window endpoint (other queries are ignored)."""
+    parts = urlsplit(target)
+    days = parse_qs(parts.query).get("days")
+    if parts.path == "/api/crypto" and days:
+        return f"/api/crypto?days={days[0]}"
+    return parts.path
+
+async def respond(path: str, method: str, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    if_none_match = headers.get("if-none-match", "")
+    not_found = response(404, {"Content-Type": "text/plain"}, b"Not found\n", keep_alive)
+    try:
+        if path in ROUTES:
+            entry = await ROUTES[path].get()
+            etag, ctype, body = entry.etag, entry.ctype, entry.body
+        elif path.startswith("/charts/"):
+            found = await asyncio.to_thread(read_chart, path[len("/charts/"):], if_none_match)
+            if found is None:
+                return not_found
+            (etag, body), ctype = found, "image/png"
+        else:
+            return not_found
+    except Exception as e:
+        print(f"Failed to build {path}: {e}")
+        return response(500, {"Content-Type": "text/plain"}, b"Internal server error\n", keep_alive)
+
+    common = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in if_none_match:
+        return response(304, common, keep_alive=keep_alive)
+    common["Content-Type"] = ctype
+    common["Content-Length"] = str(len(body))
+    return response(200, common, b"" if method == "HEAD" else body, keep_alive)
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                writer.write(response(400, {}, keep_alive=False))
+                break
+            method, target, version = parts
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            if method not in ("GET", "HEAD"):
+                writer.write(response(405, {"Allow": "GET, HEAD"}, keep_alive=keep_alive))
+            else:
+                writer.write(await respond(route_key(target), method, headers, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve() -> None:
+    server = await asyncio.start_server(handle, HOST, PORT)
+    print(f"Serving latest snapshots on http://{HOST}:{PORT}/report.html")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,189 @@
+"""
+rollups.py
+- Keeps pre-aggregated tiers for the crypto price and weather temperature history
+- Tiers: hourly and daily buckets with open/high/low/close/mean/count
+- Updated incrementally after each ingest: only points newer than what the tiers
+  already hold are merged, so re-fetching an overlapping 7-day window is cheap
+- The first ingest into a series with no tiers yet seeds them from the dated CSVs,
+  so existing installs don't start from a single point
+- Each tier has its own retention (ROLLUP_HOURLY_DAYS / ROLLUP_DAILY_DAYS, 0 = forever)
+- Files: data/rollups/<series>_<tier>.csv; buckets follow local hours and calendar days,
+  like snapshot_date and the crypto iso_time column
+
+Usage:
+    python rollups.py     # rebuild the tiers from every dated CSV already in data/
+"""
+
+import os
+import csv
+import time
+import pathlib
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+import snapshot_store
+
+load_dotenv()
+COIN = os.getenv("CRYPTO_COIN", "bitcoin")
+CURR = os.getenv("CRYPTO_CURRENCY", "inr")
+CITY = os.getenv("OWN_CITY", "Noida")
+COUNTRY = os.getenv("OWN_COUNTRY", "IN")
+
+TIERS = {
+    "hourly": (3600, int(os.getenv("ROLLUP_HOURLY_DAYS", "90"))),
+    "daily": (86400, int(os.getenv("ROLLUP_DAILY_DAYS", "0"))),
+}
+FIELDS = ["bucket_start", "bucket_iso", "open", "high", "low", "close", "mean", "count", "sum", "first_ts", "last_ts"]
+
+ROOT = pathlib.Path(__file__).parent.resolve()
+DATA_DIR = ROOT / "data"
+ROLLUP_DIR = DATA_DIR / "rollups"
+ROLLUP_DIR.mkdir(parents=True, exist_ok=True)
+
+def crypto_series() -> str:
+    return f"crypto_{COIN}_{CURR}"
+
+def weather_series() -> str:
+    return f"weather_{CITY}_{COUNTRY}"
+
+def tier_path(series: str, tier: str) -> pathlib.Path:
+    return ROLLUP_DIR / f"{series}_{tier}.csv"
+
+# ---------- file io ----------
+def load_tier(series: str, tier: str) -> Dict[int, Dict[str, Any]]:
+    p = tier_path(series, tier)
+    buckets: Dict[int, Dict[str, Any]] = {}
+    if not p.is_file():
+        return buckets
+    with open(p, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            b = {k: float(row[k]) for k in ("open", "high", "low", "close", "mean", "sum")}
+            b.update({k: int(row[k]) for k in ("bucket_start", "count", "first_ts", "last_ts")})
+            b["bucket_iso"] = row["bucket_iso"]
+            buckets[b["bucket_start"]] = b
+    return buckets
+
+def save_tier(series: str, tier: str, buckets: Dict[int, Dict[str, Any]]) -> None:
+    p = tier_path(series, tier)
+    tmp = p.with_suffix(".csv.tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for start in sorted(buckets):
+            b = buckets[start]
+            b["bucket_iso"] = datetime.fromtimestamp(start).isoformat(timespec="seconds")
+            writer.writerow({k: b[k] for k in FIELDS})
+    os.replace(tmp, p)
+
+# ---------- aggregation ----------
+def bucket_start(ts: int, size: int) -> int:
+    # local clock for both tiers, so hourly buckets nest inside the daily ones
+    # (UTC hours would straddle local hours in half-hour zones like IST)
+    start = datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0)
+    if size == 86400:
+        # local midnight, so daily labels match snapshot_date
+        start = start.replace(hour=0)
+    return int(start.timestamp())
+
+def merge_point(buckets: Dict[int, Dict[str, Any]], size: int, ts: int, value: float) -> None:
+    start = bucket_start(ts, size)
+    b = buckets.get(start)
+    if b is None:
+        buckets[start] = {
+            "bucket_start": start, "open": value, "high": value, "low": value, "close": value,
+            "mean": value, "count": 1, "sum": value, "first_ts": ts, "last_ts": ts,
+        }
+        return
+    if ts < b["first_ts"]:
+        b["open"], b["first_ts"] = value, ts
+    if ts > b["last_ts"]:
+        b["close"], b["last_ts"] = value, ts
+    b["high"] = max(b["high"], value)
+    b["low"] = min(b["low"], value)
+    b["sum"] += value
+    b["count"] += 1
+    b["mean"] = b["sum"] / b["count"]
+
+def update_rollups(series: str, points: Iterable[Tuple[int, float]], now: Optional[float] = None) -> int:
+    """
+    Merge new (epoch_seconds, value) points into every tier of a series.
+    Points at or before the newest timestamp already rolled up are skipped, and
+    repeated timestamps (overlapping snapshot windows) count once.
+    Returns how many points were added.
+    """
+    now = now or time.time()
+    seeder = SEEDERS.get(series)
+    if seeder and not any(tier_path(series, tier).exists() for tier in TIERS):
+        points = list(seeder()) + list(points)
+    tiers = {tier: load_tier(series, tier) for tier in TIERS}
+    watermark = max((b["last_ts"] for bs in tiers.values() for b in bs.values()), default=0)
+    # keyed on timestamp: the daily crypto files each hold a 7-day window and overlap
+    by_ts = {int(ts): float(v) for ts, v in points if v is not None and v != ""}
+    fresh = sorted((ts, v) for ts, v in by_ts.items() if ts > watermark)
+
+    for tier, (size, keep_days) in TIERS.items():
+        buckets = tiers[tier]
+        cutoff = now - keep_days * 86400 if keep_days else None
+        for ts, value in fresh:
+            if cutoff is None or ts >= cutoff:
+                merge_point(buckets, size, ts, value)
+        # retention: drop whole buckets that fell out of the window
+        if cutoff is not None:
+            for start in [s for s in buckets if s + size <= cutoff]:
+                del buckets[start]
+        if fresh or cutoff is not None:
+            save_tier(series, tier, buckets)
+    return len(fresh)
+
+def read_rollup(series: str, tier: str, days: Optional[int] = None,
+                until: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Buckets of one tier, oldest first; days limits to the trailing window.
+    until: optional epoch end of the window (default now), e.g. for backfills.
+    """
+    buckets = load_tier(series, tier)
+    end = until or time.time()
+    since = end - days * 86400 if days else 0
+    return [buckets[s] for s in sorted(buckets) if s + TIERS[tier][0] > since and s < end]
+
+def tier_for(days: int) -> str:
+    """Hourly detail for short windows, daily buckets for long ones."""
+    hourly_keep = TIERS["hourly"][1]
+    return "hourly" if days <= 30 and (not hourly_keep or days <= hourly_keep) else "daily"
+
+# ---------- seeding from existing snapshots ----------
+def crypto_points_from_files() -> List[Tuple[int, float]]:
+    points = []
+    for p in sorted(DATA_DIR.glob(f"{crypto_series()}_*.csv")):
+        with open(p, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                price = row.get(f"price_{CURR}")
+                if row.get("timestamp") and price:
+                    points.append((int(row["timestamp"]), float(price)))
+    return points
+
+def weather_points_from_files() -> List[Tuple[int, float]]:
+    points = []
+    for p in snapshot_store.list_snapshots(f"{weather_series()}_*.csv"):
+        for row in snapshot_store.read_rows(p):
+            if row.get("timestamp") and row.get("temp"):
+                points.append((int(row["timestamp"]), float(row["temp"])))
+    return points
+
+SEEDERS = {
+    crypto_series(): crypto_points_from_files,
+    weather_series(): weather_points_from_files,
+}
+
+def seed_from_files() -> None:
+    added = []
+    for series in SEEDERS:
+        # start from scratch; update_rollups() then seeds the empty series from files
+        for tier in TIERS:
+            tier_path(series, tier).unlink(missing_ok=True)
+        added.append(f"{series} +{update_rollups(series, [])} point(s)")
+    print("Rollups updated: " + ", ".join(added))
+
+if __name__ == "__main__":
+    seed_from_files()
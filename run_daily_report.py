@@ -15,6 +15,12 @@ def run(cmd: list[str]) -> None:
     subprocess.run(cmd, cwd=ROOT, check=True)
 
 if __name__ == "__main__":
+    # Long-running mode: per-source intervals, warm imports/connections
+    if "--daemon" in sys.argv:
+        from report_daemon import main
+        main()
+        raise SystemExit(0)
+
     # 1) Refresh GitHub repos report
     run([sys.executable, "github_repos_to_csv.py"])
     
@@ -0,0 +1,188 @@
+"""
+snapshot_store.py
+- Content-addressed storage for the daily repos/weather CSV snapshots
+- The payload is hashed with volatile columns (snapshot_date, timestamp) left out;
+  each unique payload is stored once as data/blobs/<sha256>.csv
+- Each dated snapshot is a small ref file, data/snapshots/<name>.json, holding only the
+  blob id and the volatile values with their column positions (the blob header has the rest)
+- *_latest.csv is a pointer file, data/snapshots/<name>.ptr, holding the dated name
+- Saving only touches that snapshot's own ref; replacing a ref deletes its old blob
+  once no other ref uses it
+- Readers go through read_rows()/read_bytes()/list_snapshots(), which also accept
+  plain CSV files on disk (older history, crypto files)
+
+Usage:
+    python snapshot_store.py     # move existing repos/weather CSVs in data/ into the store
+"""
+
+import os
+import io
+import csv
+import json
+import hashlib
+import pathlib
+import threading
+from typing import Dict, Any, List, Iterable, Optional
+
+ROOT = pathlib.Path(__file__).parent.resolve()
+DATA_DIR = ROOT / "data"
+BLOB_DIR = DATA_DIR / "blobs"
+REF_DIR = DATA_DIR / "snapshots"
+BLOB_DIR.mkdir(parents=True, exist_ok=True)
+REF_DIR.mkdir(parents=True, exist_ok=True)
+
+REPOS_VOLATILE = ("snapshot_date",)
+WEATHER_VOLATILE = ("snapshot_date", "timestamp")
+
+_lock = threading.Lock()  # the daemon saves from several threads
+
+# ---------- refs ----------
+def ref_path(name: str) -> pathlib.Path:
+    return REF_DIR / f"{name}.json"
+
+def pointer_path(path: pathlib.Path) -> pathlib.Path:
+    """File that changes whenever the latest snapshot behind path does (for cache stamps)."""
+    return REF_DIR / f"{pathlib.Path(path).name}.ptr"
+
+def write_atomic(p: pathlib.Path, text: str) -> None:
+    # write-then-rename so readers never see a half-written file
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8", newline="")
+    os.replace(tmp, p)
+
+def load_ref(name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(ref_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def blob_in_use(blob: str) -> bool:
+    for p in REF_DIR.glob("*.json"):
+        with open(p, encoding="utf-8") as f:
+            if json.load(f)["blob"] == blob:
+                return True
+    return False
+
+def to_csv(rows: List[Dict[str, Any]], fieldnames: List[str]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+# ---------- writers ----------
+def write_snapshot(path: pathlib.Path, rows: List[Dict[str, Any]], volatile: Iterable[str]) -> str:
+    """
+    Store rows under the snapshot name path.name; returns the blob id.
+    Identical payloads (ignoring volatile columns) share one blob.
+    """
+    path = pathlib.Path(path)
+    fields = list(rows[0].keys())
+    stable = [c for c in fields if c not in volatile]
+
+    payload = to_csv(rows, stable)
+    blob = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # column -> [position, value]; one value when all rows agree (the usual case), else one per row
+    vol: Dict[str, Any] = {}
+    for i, c in enumerate(fields):
+        if c in volatile:
+            values = [r.get(c) for r in rows]
+            vol[c] = [i, values[0] if len(set(map(str, values))) == 1 else {"rows": values}]
+
+    with _lock:
+        blob_path = BLOB_DIR / f"{blob}.csv"
+        if not blob_path.exists():
+            write_atomic(blob_path, payload)
+        old = load_ref(path.name)
+        write_atomic(ref_path(path.name), json.dumps({"blob": blob, "volatile": vol}, separators=(",", ":")))
+        # a same-day re-save replaces the entry; drop the blob it leaves behind
+        if old and old["blob"] != blob and not blob_in_use(old["blob"]):
+            (BLOB_DIR / f"{old['blob']}.csv").unlink(missing_ok=True)
+    # a full CSV left by an older version would shadow the ref
+    path.unlink(missing_ok=True)
+    return blob
+
+def point_latest(latest: pathlib.Path, dated: pathlib.Path) -> None:
+    """Make latest.name resolve to the dated snapshot instead of storing a copy."""
+    latest = pathlib.Path(latest)
+    with _lock:
+        # rewritten even when unchanged, so pointer_path() stamps follow re-saves of the target
+        write_atomic(pointer_path(latest), pathlib.Path(dated).name)
+    latest.unlink(missing_ok=True)
+
+# ---------- readers ----------
+def resolve(name: str) -> Optional[Dict[str, Any]]:
+    ptr = pointer_path(pathlib.Path(name))
+    if ptr.is_file():
+        name = ptr.read_text(encoding="utf-8").strip()
+    return load_ref(name)
+
+def read_rows(path: pathlib.Path) -> List[Dict[str, str]]:
+    """Rows of a snapshot as csv.DictReader would return them ([] if missing)."""
+    path = pathlib.Path(path)
+    if path.is_file():
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    ref = resolve(path.name)
+    if ref is None:
+        return []
+    with open(BLOB_DIR / f"{ref['blob']}.csv", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        fields = list(reader.fieldnames or [])
+    # put the volatile columns back where they were
+    for c, (i, v) in sorted(ref["volatile"].items(), key=lambda kv: kv[1][0]):
+        fields.insert(i, c)
+        values = v["rows"] if isinstance(v, dict) else [v] * len(rows)
+        for row, value in zip(rows, values):
+            row[c] = "" if value is None else str(value)
+    return [{k: row.get(k, "") for k in fields} for row in rows]
+
+def read_bytes(path: pathlib.Path) -> bytes:
+    """The snapshot rendered as a CSV file (b'' if missing), e.g. for email attachments."""
+    path = pathlib.Path(path)
+    if path.is_file():
+        return path.read_bytes()
+    rows = read_rows(path)
+    if not rows:
+        return b""
+    return to_csv(rows, list(rows[0])).encode("utf-8")
+
+def exists(path: pathlib.Path) -> bool:
+    path = pathlib.Path(path)
+    return path.is_file() or resolve(path.name) is not None
+
+def list_snapshots(pattern: str) -> List[pathlib.Path]:
+    """Like sorted(DATA_DIR.glob(pattern)) but including refs and pointers."""
+    names = {p.name for p in DATA_DIR.glob(pattern)}
+    names |= {p.stem for p in REF_DIR.glob(f"{pattern}.json")}
+    names |= {p.stem for p in REF_DIR.glob(f"{pattern}.ptr")}
+    return [DATA_DIR / n for n in sorted(names)]
+
+# ---------- migration ----------
+def migrate() -> None:
+    moved = 0
+    for pattern, volatile in (("github_repos_*.csv", REPOS_VOLATILE), ("weather_*_*.csv", WEATHER_VOLATILE)):
+        for p in sorted(DATA_DIR.glob(pattern)):
+            if "latest" in p.name:
+                continue
+            with open(p, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            if rows:
+                write_snapshot(p, rows, volatile)
+                moved += 1
+
+    # latest copies become pointers to the newest dated entry with the same content
+    for latest, prefix in (("github_repos_latest.csv", "github_repos_"), ("weather_latest.csv", "weather_")):
+        p = DATA_DIR / latest
+        dated = [n for n in list_snapshots(f"{prefix}*.csv") if n.name != latest]
+        if p.is_file() and dated and read_rows(dated[-1]) == read_rows(p):
+            point_latest(p, dated[-1])
+
+    blobs = len(list(BLOB_DIR.glob("*.csv")))
+    print(f"Moved {moved} snapshot(s) into the store ({blobs} unique blob(s))")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,62 @@
+"""
+summary_state.py
+- Small persisted summary of the latest snapshots (data/summary.json)
+- Fetchers update their own section as they write CSVs: repo totals + top-N,
+  latest/min/max crypto price, current weather row
+- The report loads just this document, so building it doesn't depend on data volume
+"""
+
+import os
+import json
+import pathlib
+import threading
+from datetime import datetime
+from typing import Dict, Any, List
+
+ROOT = pathlib.Path(__file__).parent.resolve()
+DATA_DIR = ROOT / "data"
+SUMMARY_PATH = DATA_DIR / "summary.json"
+TOP_N = 5
+
+_lock = threading.Lock()  # the daemon updates sections from several threads
+
+def load_summary() -> Dict[str, Any]:
+    if not SUMMARY_PATH.is_file():
+        return {}
+    try:
+        with open(SUMMARY_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def update_section(name: str, payload: Dict[str, Any]) -> None:
+    with _lock:
+        summary = load_summary()
+        summary[name] = dict(payload, updated_at=datetime.now().isoformat(timespec="seconds"))
+        # write-then-rename so readers never see a half-written file
+        tmp = SUMMARY_PATH.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, default=str)
+        os.replace(tmp, SUMMARY_PATH)
+
+# ---------- section builders (called with rows already in memory) ----------
+def repos_section(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stars = lambda r: int(r.get("stargazers_count") or 0)
+    return {
+        "total_repos": len(rows),
+        "public_repos": sum(1 for r in rows if r.get("visibility") == "public"),
+        "total_stars": sum(stars(r) for r in rows),
+        "top_repos": sorted(rows, key=stars, reverse=True)[:TOP_N],
+    }
+
+def crypto_section(rows: List[Dict[str, Any]], curr: str) -> Dict[str, Any]:
+    prices = [float(r.get(f"price_{curr}") or 0.0) for r in rows]
+    if not prices:
+        return {}
+    return {
+        "latest_iso": rows[-1].get("iso_time"),
+        "latest_price": prices[-1],
+        "min_price": min(prices),
+        "max_price": max(prices),
+        "count": len(prices),
+    }
@@ -1,59 +1,67 @@
 """
 weather_trend_chart.py
-- Reads dated weather snapshot CSV files from data/
-- Picks up to the last 7 snapshots (by snapshot_date or filename)
+- Reads the daily weather rollup (data/rollups/) for the last WEATHER_TREND_DAYS days
+- Falls back to dated weather snapshot CSV files from data/ when no rollup exists yet,
+  picking up to the last 7 snapshots (by snapshot_date or filename)
 - Builds a simple temperature vs date chart (PNG)
 - Writes dated + rolling latest PNG into charts/
 """
 
-import csv
+import os
 import pathlib
-from datetime import datetime
-from typing import List, Tuple
+from datetime import datetime, timedelta
+from typing import List, Tuple, Optional
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+import rollups
+import snapshot_store
+
 ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "data"
 CHARTS_DIR = ROOT / "charts"
 CHARTS_DIR.mkdir(exist_ok=True)
+TREND_DAYS = int(os.getenv("WEATHER_TREND_DAYS", "7"))
 
 def find_weather_files() -> List[pathlib.Path]:
     """
     Find files matching data/weather_*.csv and return them sorted by filename (which contains date).
     This gracefully falls back to weather_latest.csv if no dated files exist.
     """
-    files = sorted(DATA_DIR.glob("weather_*_*.csv")) # e.g., weather_Delhi_IN_20251111.csv
+    files = snapshot_store.list_snapshots("weather_*_*.csv") # e.g., weather_Delhi_IN_20251111.csv
     # Exclude the rolling latest if it exists in same pattern
     dated = [p for p in files if "latest" not in p.name.lower()]    
     if dated:
         return dated
     # fallback to latest only
     latest = DATA_DIR / "weather_latest.csv"
-    return [latest] if latest.exists() else []
+    return [latest] if snapshot_store.exists(latest) else []
 
 def read_temp_from_csv(path: pathlib.Path) -> Tuple[str, float]:
     """
     Read a one-row weather CSV snapshot and return (label, temp).
     Label will be snapshot_date or iso timestamp.
     """
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # try snapshot_date, then iso/time fields, then filename date
-            label = row.get("snapshot_date") or row.get("iso_time") or path.stem 
-            # prefer numeric fields in order: temp, main temp fields
-            temp = row.get("temp") or row.get("temp_max") or row.get("temp_min")   
-            try:
-                temp_val = float(temp) if temp is not None and temp != "" else None
-            except Exception:
-                temp_val = None
-            return(label, temp_val)
-        return(path.stem, None)
+    for row in snapshot_store.read_rows(path):
+        # try snapshot_date, then iso/time fields, then filename date
+        label = row.get("snapshot_date") or row.get("iso_time") or path.stem 
+        # prefer numeric fields in order: temp, main temp fields
+        temp = row.get("temp") or row.get("temp_max") or row.get("temp_min")   
+        try:
+            temp_val = float(temp) if temp is not None and temp != "" else None
+        except Exception:
+            temp_val = None
+        return(label, temp_val)
+    return(path.stem, None)
     
-def collect_last_n_temperatures(n: int = 7) -> List[Tuple[str, float]]:
+def collect_last_n_temperatures(n: int = 7, until: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    until: optional YYYYMMDD; only snapshots up to that date are used (for backfills).
+    """
     files = find_weather_files()
+    if until:
+        files = [p for p in files if p.stem.rsplit("_", 1)[-1] <= until]
     if not files:
         raise SystemExit("No weather files found in data/. Run weather_current_to_csv.py first.")    
     # pick the last n files by sorted order (which is by name/date)
@@ -75,14 +83,40 @@ def collect_last_n_temperatures(n: int = 7) -> List[Tuple[str, float]]:
         raise SystemExit("Found weather files but none had numeric temperature values.")
     return filtered
 
-def build_and_save_chart(points: List[Tuple[str, float]]) -> None:
+def collect_daily_temperatures(days: int = 7, until: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Daily mean temperature from the rollup tier: one precomputed row per day,
+    so 30/90/365-day windows don't have to reopen every snapshot file.
+    until: optional YYYYMMDD; the window ends with that (local) day.
+    """
+    end = (datetime.strptime(until, "%Y%m%d") + timedelta(days=1)).timestamp() if until else None
+    rows = rollups.read_rollup(rollups.weather_series(), "daily", days=days, until=end)
+    return [(r["bucket_iso"][:10], round(r["mean"], 2)) for r in rows]
+
+def collect_recent_temperatures(days: int = 7, until: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Rollup when there is one (it is seeded from every snapshot file on the first
+    ingest, so it covers the same history); snapshot files otherwise.
+    Both label points with the local date; until as in collect_last_n_temperatures().
+    """
+    return collect_daily_temperatures(days, until) or collect_last_n_temperatures(days, until)
+
+def build_and_save_chart(points: List[Tuple[str, float]], day: Optional[str] = None) -> None:
+    """
+    day: YYYYMMDD used in the dated filename (defaults to today). When set, the
+    rolling latest PNG is left alone so backfills don't clobber it.
+    """
     # x labels and y values
     x_labels = [p[0] for p in points]
     y_values = [p[1] for p in points]
     
     # Plot
     plt.figure(figsize=(8, 3))
-    plt.plot(x_labels, y_values, marker="o", linewidth=2)
+    plt.plot(x_labels, y_values, marker="o" if len(points) <= 31 else None, linewidth=2)
+    if len(points) > 14:
+        # long windows: thin out the date labels so they stay readable
+        step = len(points) // 10 + 1
+        plt.xticks(range(0, len(points), step), x_labels[::step], rotation=30, fontsize=8)
     plt.title("Temperature trend (last {} days)".format(len(points)))
     plt.xlabel("Date")
     plt.ylabel("Temperature (°C)")
@@ -90,18 +124,19 @@ def build_and_save_chart(points: List[Tuple[str, float]]) -> None:
     plt.tight_layout()
     
     # filenames
-    today = datetime.now().strftime("%Y%m%d")
+    today = day or datetime.now().strftime("%Y%m%d")
     png_name = f"weather_trend_{today}.png"
     png_path = CHARTS_DIR / png_name
     png_latest = CHARTS_DIR / "weather_trend_latest.png"
     
     # Save both dated and latest
     plt.savefig(png_path, dpi=120)
-    plt.savefig(png_latest, dpi=120)
+    if day is None:
+        plt.savefig(png_latest, dpi=120)
     plt.close()
     
-    print(f"Saved weather trend chart: {png_path.name} and weather_trend_latest.png")
+    print(f"Saved weather trend chart: {png_path.name}" + ("" if day else " and weather_trend_latest.png"))
     
 if __name__ == "__main__":
-    points = collect_last_n_temperatures(7)
+    points = collect_recent_temperatures(TREND_DAYS)
     build_and_save_chart(points)    
\ No newline at end of file